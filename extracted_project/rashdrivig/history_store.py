@@ -0,0 +1,234 @@
+# Multi-resolution in-memory history of MPU6050 samples
+# Keeps raw samples plus 1 s and 1 min rollups (min / max / mean per axis)
+# and returns any time range as at most N points for the dashboard charts.
+
+import threading
+import time
+import numpy as np
+
+AXES = ["AccX", "AccY", "AccZ", "GyroX", "GyroY", "GyroZ"]
+N_AXES = len(AXES)
+
+# ---------------- RING BUFFER ----------------
+class RingBuffer:
+    # Fixed capacity 2D ring of float rows, oldest row dropped when full
+
+    def __init__(self, capacity, width):
+        self.data = np.zeros((capacity, width))
+        self.capacity = capacity
+        self.start = 0
+        self.size = 0
+
+    def append(self, row):
+        idx = (self.start + self.size) % self.capacity
+        self.data[idx] = row
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def view(self):
+        # Rows in time order (copy only when the ring has wrapped)
+        end = self.start + self.size
+        if end <= self.capacity:
+            return self.data[self.start:end]
+        return np.concatenate((self.data[self.start:], self.data[:end - self.capacity]))
+
+    def oldest_time(self):
+        if self.size == 0:
+            return None
+        return self.data[self.start, 0]
+
+# ---------------- ROLLUP BUCKET ----------------
+class Rollup:
+    # Row layout: [t, count, min x6, max x6, mean x6]
+
+    def __init__(self, period, capacity):
+        self.period = period
+        self.ring = RingBuffer(capacity, 2 + 3 * N_AXES)
+        self.bucket = None
+        self.count = 0
+        self.vmin = None
+        self.vmax = None
+        self.vsum = None
+
+    def add(self, t, count, vmin, vmax, vmean):
+        # Returns the finished row when t crosses into a new bucket
+        bucket = int(t // self.period)
+        done = None
+        if self.bucket is not None and bucket != self.bucket:
+            done = self.flush()
+        if self.bucket is None:
+            self.bucket = bucket
+            self.count = 0
+            self.vmin = np.array(vmin, dtype=float)
+            self.vmax = np.array(vmax, dtype=float)
+            self.vsum = np.zeros(N_AXES)
+        else:
+            np.minimum(self.vmin, vmin, out=self.vmin)
+            np.maximum(self.vmax, vmax, out=self.vmax)
+        self.count += count
+        self.vsum += np.asarray(vmean) * count
+        return done
+
+    def open_row(self):
+        # The bucket still being filled, as a row (not yet in the ring)
+        if self.bucket is None:
+            return None
+        return np.concatenate(([self.bucket * self.period, self.count],
+                               self.vmin, self.vmax, self.vsum / self.count))
+
+    def flush(self):
+        row = self.open_row()
+        if row is None:
+            return None
+        self.ring.append(row)
+        self.bucket = None
+        return row
+
+
+def merge_rows(a, b):
+    # Combine two rollup rows into one (time of the first, weighted mean)
+    if a is None or b is None:
+        return a if b is None else b
+    n = N_AXES
+    count = a[1] + b[1]
+    return np.concatenate(([a[0], count],
+                           np.minimum(a[2:2 + n], b[2:2 + n]),
+                           np.maximum(a[2 + n:2 + 2 * n], b[2 + n:2 + 2 * n]),
+                           (a[2 + 2 * n:] * a[1] + b[2 + 2 * n:] * b[1]) / count))
+
+# ---------------- DECIMATION ----------------
+def minmax_decimate(t, vmin, vmax, vmean, count, max_points):
+    # Merge consecutive rows into at most max_points buckets, keeping the envelope
+    n = len(t)
+    if n <= max_points:
+        return t, vmin, vmax, vmean
+    edges = np.unique(np.linspace(0, n, max_points + 1).astype(int))[:-1]
+    weighted = np.add.reduceat(vmean * count[:, None], edges, axis=0)
+    total = np.add.reduceat(count, edges)
+    return (t[edges],
+            np.minimum.reduceat(vmin, edges, axis=0),
+            np.maximum.reduceat(vmax, edges, axis=0),
+            weighted / total[:, None])
+
+
+def lttb(t, y, max_points):
+    # Largest-Triangle-Three-Buckets: indices of the points that keep the shape of y
+    n = len(t)
+    if n <= max_points:
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1][:max_points])
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    keep = np.empty(max_points, dtype=int)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_t = t[nlo:nhi].mean()
+        avg_y = y[nlo:nhi].mean()
+        area = np.abs((t[a] - avg_t) * (y[lo:hi] - y[a]) -
+                      (t[a] - t[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+# ---------------- HISTORY STORE ----------------
+class HistoryStore:
+
+    def __init__(self, raw_capacity=20000, second_capacity=6 * 3600, minute_capacity=7 * 24 * 60):
+        self.lock = threading.Lock()
+        self.raw = RingBuffer(raw_capacity, 1 + N_AXES)
+        self.seconds = Rollup(1.0, second_capacity)
+        self.minutes = Rollup(60.0, minute_capacity)
+        self.first_t = None
+
+    def append(self, t, values):
+        values = np.asarray(values, dtype=float)
+        with self.lock:
+            if self.first_t is None:
+                self.first_t = t
+            self.raw.append(np.concatenate(([t], values)))
+            done = self.seconds.add(t, 1, values, values, values)
+            if done is not None:
+                self.minutes.add(done[0], done[1], *self._split(done))
+
+    @staticmethod
+    def _split(rows):
+        return (rows[..., 2:2 + N_AXES],
+                rows[..., 2 + N_AXES:2 + 2 * N_AXES],
+                rows[..., 2 + 2 * N_AXES:])
+
+    def _oldest(self):
+        # Time of the oldest sample still represented in any tier
+        if self.minutes.ring.size < self.minutes.ring.capacity:
+            return self.first_t
+        return self.minutes.ring.oldest_time()
+
+    def _select_tier(self, start):
+        # Finest tier holding data from `start`, or from the oldest data kept
+        # when the range reaches further back than anything stored
+        oldest = self._oldest()
+        if oldest is not None:
+            start = max(start, oldest)
+        raw_oldest = self.raw.oldest_time()
+        if raw_oldest is not None and raw_oldest <= start:
+            return "raw"
+        sec_oldest = self.seconds.ring.oldest_time()
+        if sec_oldest is None and self.seconds.bucket is not None:
+            sec_oldest = self.seconds.bucket * self.seconds.period
+        if sec_oldest is not None and sec_oldest <= start:
+            return "1s"
+        return "1m"
+
+    def query(self, start=None, end=None, max_points=300, method="minmax", axis=None):
+        end = time.time() if end is None else end
+        start = end - 600 if start is None else start
+        max_points = max(int(max_points), 1)
+
+        with self.lock:
+            tier = self._select_tier(start)
+            if tier == "raw":
+                rows = self.raw.view()
+            else:
+                # Include the open buckets so the newest second / minute is not missing
+                if tier == "1s":
+                    rows, open_row = self.seconds.ring.view(), self.seconds.open_row()
+                else:
+                    rows = self.minutes.ring.view()
+                    open_row = merge_rows(self.minutes.open_row(), self.seconds.open_row())
+                if open_row is not None:
+                    rows = np.vstack((rows, open_row))
+            rows = rows[(rows[:, 0] >= start) & (rows[:, 0] <= end)].copy()
+
+        t = rows[:, 0]
+        if tier == "raw":
+            vmin = vmax = vmean = rows[:, 1:]
+            count = np.ones(len(t))
+        else:
+            count = rows[:, 1]
+            vmin, vmax, vmean = self._split(rows)
+
+        if method == "lttb" and axis in AXES:
+            col = AXES.index(axis)
+            keep = lttb(t, vmean[:, col], max_points)
+            return {
+                "tier": tier,
+                "method": "lttb",
+                "t": t[keep].tolist(),
+                "values": {axis: vmean[keep, col].tolist()},
+            }
+
+        t, vmin, vmax, vmean = minmax_decimate(t, vmin, vmax, vmean, count, max_points)
+        return {
+            "tier": tier,
+            "method": "minmax",
+            "t": t.tolist(),
+            "min": {a: vmin[:, i].tolist() for i, a in enumerate(AXES)},
+            "max": {a: vmax[:, i].tolist() for i, a in enumerate(AXES)},
+            "mean": {a: vmean[:, i].tolist() for i, a in enumerate(AXES)},
+        }
@@ -0,0 +1,275 @@
+# Multi-IMU acquisition for the safety loop
+# Supports several MPU6050s (0x68 / 0x69, extra I2C buses, TCA9548A mux channels),
+# schedules burst reads per bus and fuses the time-aligned streams with numpy.
+#
+# Spec string (RASH_IMUS), comma separated:  bus:addr[:mux_addr/channel]
+#   "1:0x68"                      single IMU (default, same as before)
+#   "1:0x68,1:0x69"               two IMUs on bus 1
+#   "1:0x68:0x70/0,1:0x68:0x70/3" two IMUs behind a TCA9548A on bus 1
+#
+# An IMU whose newest sample is older than `stale_after` is left out of the
+# fusion and listed as stale in stats(). Loose-mount detection compares each
+# board with the median of the others, so it needs 3 or more fresh IMUs.
+
+import os
+import time
+import numpy as np
+
+# smbus block reads are blocking C calls that never yield to eventlet, so
+# the bus workers must be real OS threads (with real sleeps) even when
+# main.py has monkey patched threading / time. Everything called from the
+# safety loop keeps the patched `time` so it still yields to the hub.
+try:
+    from eventlet import patcher
+    _threading = patcher.original("threading")
+    _time = patcher.original("time")
+except ImportError:
+    import threading as _threading
+    import time as _time
+
+if os.environ.get("RASH_SIM") == "1":
+    from sim_hardware import SMBus
+else:
+    from smbus import SMBus
+
+PWR_MGMT_1 = 0x6B
+SLEEP_BIT = 0x40
+ACCEL_XOUT_H = 0x3B
+
+ACC_SCALE = 16384.0
+GYRO_SCALE = 131.0
+# One burst read of 0x3B..0x48: accel x3, temp, gyro x3 (big endian int16)
+SCALE = np.array([ACC_SCALE] * 3 + [GYRO_SCALE] * 3)
+
+# ---------------- DEVICES ----------------
+class TCA9548A:
+    def __init__(self, bus, address=0x70):
+        self.bus = bus
+        self.address = address
+        self.channel = None
+
+    def select(self, channel):
+        # Only touch the mux when the channel actually changes
+        if channel != self.channel:
+            self.bus.write_byte(self.address, 1 << channel)
+            self.channel = channel
+
+
+class MPU6050:
+    def __init__(self, bus, address=0x68, mux=None, channel=None, name=None):
+        self.bus = bus
+        self.address = address
+        self.mux = mux
+        self.channel = channel
+        self.name = name or (f"0x{address:02x}" if mux is None else f"0x{address:02x}@ch{channel}")
+
+    def select(self):
+        if self.mux is not None:
+            self.mux.select(self.channel)
+
+    def wake(self):
+        self.select()
+        self.bus.write_byte_data(self.address, PWR_MGMT_1, 0)
+
+    def asleep(self):
+        # A board that browned out powers up in sleep mode and keeps
+        # returning its last values without any bus error
+        self.select()
+        return bool(self.bus.read_byte_data(self.address, PWR_MGMT_1) & SLEEP_BIT)
+
+    def read(self):
+        # Single 14 byte transaction instead of twelve byte reads
+        self.select()
+        raw = bytes(self.bus.read_i2c_block_data(self.address, ACCEL_XOUT_H, 14))
+        vals = np.frombuffer(raw, dtype=">i2").astype(float)
+        return np.concatenate((vals[0:3], vals[4:7])) / SCALE
+
+
+class Stream:
+    # Per-device ring of (t, AccX..GyroZ)
+
+    def __init__(self, capacity=1024):
+        self.data = np.zeros((capacity, 7))
+        self.capacity = capacity
+        self.count = 0
+
+    def append(self, t, values):
+        row = self.data[self.count % self.capacity]
+        row[0] = t
+        row[1:] = values
+        self.count += 1
+
+    def latest(self, n):
+        n = min(n, self.count, self.capacity)
+        idx = (np.arange(self.count - n, self.count)) % self.capacity
+        return self.data[idx]
+
+# ---------------- BUS SCHEDULER ----------------
+class BusWorker:
+    # Reads every device on one bus in turn; devices behind the same mux
+    # channel are grouped so the mux is switched as rarely as possible.
+    # Devices are (re)woken here: at start, after any bus error and whenever
+    # the periodic sleep-bit check finds one back in sleep mode.
+
+    def __init__(self, devices, rate_hz, lock, wake_check=1.0):
+        self.devices = sorted(devices, key=lambda d: (d.mux is not None, d.channel or 0, d.address))
+        self.period = 1.0 / rate_hz
+        self.lock = lock
+        self.wake_check = wake_check
+        self.streams = {d.name: Stream() for d in self.devices}
+        self.awake = set()
+        self.errors = 0
+        self.wakes = 0
+        self.reads = 0
+        self.read_s = 0.0
+        self.read_s_max = 0.0
+
+    def run(self):
+        next_t = _time.perf_counter()
+        checked = next_t
+        while True:
+            check = _time.perf_counter() - checked >= self.wake_check
+            if check:
+                checked = _time.perf_counter()
+            for dev in self.devices:
+                try:
+                    if dev.name in self.awake and check and dev.asleep():
+                        self.awake.discard(dev.name)
+                    if dev.name not in self.awake:
+                        dev.wake()
+                        self.awake.add(dev.name)
+                        self.wakes += 1
+                    t0 = _time.time()
+                    values = dev.read()
+                    t1 = _time.time()
+                except OSError:
+                    # Missing or browned-out board: wake it again on the next pass
+                    self.errors += 1
+                    self.awake.discard(dev.name)
+                    if dev.mux is not None:
+                        dev.mux.channel = None
+                    continue
+                with self.lock:
+                    # Timestamp at the middle of the transaction
+                    self.streams[dev.name].append((t0 + t1) / 2, values)
+                self.reads += 1
+                self.read_s += t1 - t0
+                self.read_s_max = max(self.read_s_max, t1 - t0)
+
+            next_t += self.period
+            delay = next_t - _time.perf_counter()
+            if delay > 0:
+                _time.sleep(delay)
+            else:
+                next_t = _time.perf_counter()
+
+# ---------------- FUSION ----------------
+def align(streams, t_grid):
+    # Resample every stream onto a shared time grid -> (devices, samples, 6)
+    out = np.empty((len(streams), len(t_grid), 6))
+    for i, s in enumerate(streams):
+        for axis in range(6):
+            out[i, :, axis] = np.interp(t_grid, s[:, 0], s[:, axis + 1])
+    return out
+
+
+def fuse(aligned):
+    # Median across IMUs is the chassis motion; what each board adds on top
+    # of it (RMS per device) shows a loose or badly mounted sensor. With two
+    # boards the median is their mean and both get the same residual, so the
+    # loose one can't be told apart: residual is None below 3 IMUs.
+    chassis = np.median(aligned, axis=0)
+    if len(aligned) < 3:
+        return chassis, None
+    residual = np.sqrt(np.mean((aligned - chassis) ** 2, axis=1))
+    return chassis, residual
+
+
+class IMUArray:
+
+    def __init__(self, devices, rate_hz=200, stale_after=None):
+        self.devices = devices
+        # A few bus periods without a new sample and an IMU counts as dead
+        self.stale_after = stale_after or max(5.0 / rate_hz, 0.05)
+        # Shared with the bus worker OS threads, so a real lock
+        self.lock = _threading.Lock()
+        by_bus = {}
+        for dev in devices:
+            by_bus.setdefault(id(dev.bus), []).append(dev)
+        self.workers = [BusWorker(devs, rate_hz, self.lock) for devs in by_bus.values()]
+        self.streams = {}
+        for w in self.workers:
+            self.streams.update(w.streams)
+
+    @classmethod
+    def from_spec(cls, spec, rate_hz=200):
+        buses, muxes, devices = {}, {}, []
+        for item in spec.split(","):
+            parts = item.strip().split(":")
+            bus_no = int(parts[0])
+            address = int(parts[1], 0)
+            bus = buses.setdefault(bus_no, SMBus(bus_no))
+            mux, channel = None, None
+            if len(parts) > 2:
+                mux_addr, channel = parts[2].split("/")
+                mux_addr, channel = int(mux_addr, 0), int(channel)
+                mux = muxes.setdefault((bus_no, mux_addr), TCA9548A(bus, mux_addr))
+            dev = MPU6050(bus, address, mux, channel)
+            dev.name = f"{bus_no}:{dev.name}"
+            devices.append(dev)
+        return cls(devices, rate_hz)
+
+    def start(self):
+        # Devices are woken by their bus worker, so one IMU that is missing at
+        # boot only shows up as stale instead of stopping the whole program
+        for w in self.workers:
+            _threading.Thread(target=w.run, daemon=True).start()
+
+    def window(self, n=64):
+        # Last n samples of every fresh IMU, fused on the timeline they all cover.
+        # Returns (t_grid, chassis, residual, names of the fused IMUs).
+        with self.lock:
+            latest = [(d.name, self.streams[d.name].latest(n)) for d in self.devices]
+        oldest_ok = time.time() - self.stale_after
+        fresh = [(name, s) for name, s in latest if len(s) and s[-1, 0] >= oldest_ok]
+        if not fresh:
+            return None, None, None, []
+        names = [name for name, _ in fresh]
+        streams = [s for _, s in fresh]
+        start = max(s[0, 0] for s in streams)
+        end = min(s[-1, 0] for s in streams)
+        if end <= start:
+            t_grid = np.array([end])
+        else:
+            t_grid = np.linspace(start, end, max(len(s) for s in streams))
+        chassis, residual = fuse(align(streams, t_grid))
+        return t_grid, chassis, residual, names
+
+    def read(self, timeout=1.0):
+        # Newest fused sample (AccX..GyroZ). Raises OSError when no IMU has
+        # produced a fresh sample within `timeout`, so a dead bus is never
+        # mistaken for a car standing still.
+        deadline = time.time() + timeout
+        while True:
+            _, chassis, _, _ = self.window(8)
+            if chassis is not None:
+                return chassis[-1]
+            if time.time() > deadline:
+                raise OSError("no fresh IMU samples")
+            time.sleep(0.01)
+
+    def stats(self):
+        _, _, residual, names = self.window()
+        return {
+            "imus": [d.name for d in self.devices],
+            "fresh": names,
+            "stale": [d.name for d in self.devices if d.name not in names],
+            "reads": sum(w.reads for w in self.workers),
+            "errors": sum(w.errors for w in self.workers),
+            "wakes": sum(w.wakes for w in self.workers),
+            # I2C transaction time per bus worker
+            "read_ms": [{"avg": w.read_s / w.reads * 1000 if w.reads else None,
+                         "max": w.read_s_max * 1000} for w in self.workers],
+            # Per fresh IMU (same order as "fresh"); None with fewer than 3 fresh IMUs
+            "residual_rms": None if residual is None else residual.tolist(),
+        }
@@ -0,0 +1,196 @@
+# Load generator for the Socket.IO dashboard server in main.py
+# Simulates many dashboard viewers (status / alert subscribers) and slider
+# clients spamming set_speed, then reports fan-out latency, missed ticks,
+# server CPU and safety-loop jitter.
+#
+# Run against a simulated server it starts itself:
+#   python3 load_test.py --spawn --viewers 300 --drivers 30 --duration 60
+# Or against one already running (pass --pid to also sample its CPU):
+#   RASH_SIM=1 python3 main.py &
+#   python3 load_test.py --url http://127.0.0.1:5000 --pid $!
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import requests
+import socketio
+
+# ---------------- CLIENTS ----------------
+class Viewer:
+    def __init__(self, url):
+        self.sio = socketio.Client(reconnection=False)
+        self.url = url
+        self.ticks = {}   # safety-loop tick -> fan-out latency (ms)
+        self.status = 0
+        self.alerts = 0
+        self.rash = 0
+        self.sio.on("status", self.on_status)
+        self.sio.on("alert", self.on_alert)
+
+    def on_status(self, data):
+        self.status += 1
+        tick = data.get("tick")
+        if tick is None:
+            return
+        self.ticks[tick] = (time.time() - data["ts"]) * 1000
+
+    def on_alert(self, data):
+        self.alerts += 1
+        # set_speed answers a throttle jump of more than 30 with this alert
+        if "RASH ACCELERATION" in data.get("msg", ""):
+            self.rash += 1
+
+    def connect(self):
+        self.sio.connect(self.url, transports=["websocket"])
+
+    def close(self):
+        self.sio.disconnect()
+
+
+class Throttle:
+    # One slider position shared by all drivers. The server compares every
+    # set_speed with a single last value, so independent walks would drift
+    # more than 30 apart and measure the rash acceleration path instead.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.speed = 0
+
+    def step(self):
+        with self.lock:
+            self.speed = max(0, min(100, self.speed + random.randint(-5, 5)))
+            return self.speed
+
+
+class Driver(Viewer):
+    # Moves the shared accelerator slider in small steps at `rate` events / second
+
+    def __init__(self, url, rate, throttle):
+        super().__init__(url)
+        self.period = 1.0 / rate
+        self.throttle = throttle
+        self.sent = 0
+        self.running = True
+
+    def spam(self):
+        while self.running:
+            speed = self.throttle.step()
+            self.sio.emit("set_speed", {"speed": speed})
+            self.sent += 1
+            time.sleep(self.period)
+
+# ---------------- SERVER METRICS ----------------
+def cpu_seconds(pid):
+    # utime + stime of a process from /proc (Linux only)
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    v = sorted(values)
+    return round(v[min(int(len(v) * q), len(v) - 1)], 2)
+
+
+def spawn_server(port):
+    env = dict(os.environ, RASH_SIM="1")
+    server = subprocess.Popen([sys.executable, "main.py"], env=env,
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(url + "/loop_stats", timeout=1)
+            return server, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+# ---------------- MAIN ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Socket.IO dashboard load test")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--spawn", action="store_true", help="start main.py with RASH_SIM=1")
+    parser.add_argument("--pid", type=int, help="server pid for CPU sampling")
+    parser.add_argument("--viewers", type=int, default=100)
+    parser.add_argument("--drivers", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=20.0, help="set_speed events / s per driver")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--ramp", type=float, default=50.0, help="connections / s")
+    args = parser.parse_args()
+
+    server = None
+    pid = args.pid
+    url = args.url
+    if args.spawn:
+        server, url = spawn_server(5000)
+        pid = server.pid
+
+    clients = [Viewer(url) for _ in range(args.viewers)]
+    throttle = Throttle()
+    drivers = [Driver(url, args.rate, throttle) for _ in range(args.drivers)]
+    failed = 0
+    print(f"🔌 Connecting {len(clients)} viewers + {len(drivers)} drivers to {url}")
+    for c in clients + drivers:
+        try:
+            c.connect()
+        except Exception as e:
+            failed += 1
+            print(f"❌ Connect failed: {e}")
+        time.sleep(1.0 / args.ramp)
+    connected = [c for c in clients + drivers if c.sio.connected]
+
+    before = requests.get(url + "/loop_stats").json()
+    cpu_start = cpu_seconds(pid) if pid else None
+    wall_start = time.time()
+
+    for d in drivers:
+        if d.sio.connected:
+            threading.Thread(target=d.spam, daemon=True).start()
+    print(f"🚗 Running load for {args.duration:.0f}s")
+    time.sleep(args.duration)
+    for d in drivers:
+        d.running = False
+
+    wall = time.time() - wall_start
+    cpu = (cpu_seconds(pid) - cpu_start) / wall * 100 if pid else None
+    # Work / jitter of the ticks inside the load window only
+    after = requests.get(url + "/loop_stats", params={"since": before["ticks"]}).json()
+
+    for c in connected:
+        c.close()
+    if server is not None:
+        server.terminate()
+        server.wait()
+
+    # -------- REPORT --------
+    # Only ticks emitted while the load was running
+    window = range(before["ticks"] + 1, after["ticks"] + 1)
+    server_ticks = len(window)
+    latencies = [c.ticks[t] for c in connected for t in window if t in c.ticks]
+    received = len(latencies)
+    missed = server_ticks * len(connected) - received
+
+    print("\n📊 LOAD TEST RESULT")
+    print(f"Clients connected     : {len(connected)} ({failed} failed)")
+    print(f"set_speed sent        : {sum(d.sent for d in drivers)}")
+    print(f"Safety loop ticks     : {server_ticks}")
+    print(f"Tick events received  : {received} (expected {server_ticks * len(connected)})")
+    print(f"Tick events missed    : {missed}")
+    print(f"All status / alert    : {sum(c.status for c in connected)} / {sum(c.alerts for c in connected)}")
+    print(f"Rash accel alerts     : {sum(d.rash for d in drivers)}")
+    print(f"Fan-out latency ms    : p50={percentile(latencies, 0.5)} "
+          f"p99={percentile(latencies, 0.99)} max={percentile(latencies, 1.0)}")
+    print(f"Server CPU %          : {'n/a' if cpu is None else round(cpu, 1)}")
+    print(f"Loop work ms          : {after['work_ms']}")
+    print(f"Loop sleep jitter ms  : {after['jitter_ms']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,26 @@
-import smbus, time, joblib, numpy as np, socket
-import RPi.GPIO as GPIO
+# Flask-SocketIO serves through eventlet; without patching, emits from the
+# safety thread below never reach the dashboard clients
+import eventlet
+eventlet.monkey_patch()
+
+import time, socket, os
+import collections
+import hmac
+
+# RASH_SIM=1 runs on simulated GPIO / I2C (sim_hardware.py), e.g. for load_test.py
+SIMULATED = os.environ.get("RASH_SIM") == "1"
+if SIMULATED:
+    from sim_hardware import GPIO
+else:
+    import RPi.GPIO as GPIO
 import pandas as pd
-from flask import Flask, render_template
+from flask import Flask, render_template, request, jsonify, Response
 from flask_socketio import SocketIO, emit
 import threading
+from history_store import HistoryStore
+from model_registry import ModelRegistry
+from imu import IMUArray
+from profiler import SectionTimer, SamplingProfiler
 
 # ---------------- GET IP ADDRESS ----------------
 def get_ip():
@@ -74,21 +91,16 @@ def slow_stop():
     motor_stop()
 
 # ---------------- ML + MPU6050 ----------------
-model = joblib.load("rash_driving_model.pkl")
+# New versions dropped into models/ are validated and swapped in without a restart.
+# RASH_SHADOW=1 runs them as a shadow candidate instead (stats only, no actuation).
+registry = ModelRegistry("rash_driving_model.pkl",
+                         watch_dir=os.environ.get("RASH_MODEL_DIR", "models"),
+                         shadow=os.environ.get("RASH_SHADOW") == "1")
+registry.start()
 
-PWR_MGMT_1 = 0x6B
-ACCEL_XOUT_H = 0x3B
-GYRO_XOUT_H = 0x43
-
-bus = smbus.SMBus(1)
-bus.write_byte_data(0x68, PWR_MGMT_1, 0)
-
-def read_raw(addr):
-    high = bus.read_byte_data(0x68, addr)
-    low = bus.read_byte_data(0x68, addr+1)
-    val = (high << 8) | low
-    if val > 32768: val -= 65536
-    return val
+# RASH_IMUS lists the MPU6050s to read, e.g. "1:0x68,1:0x69" (see imu.py)
+imus = IMUArray.from_spec(os.environ.get("RASH_IMUS", "1:0x68"))
+imus.start()
 
 # ---------------- FLASK WEB SERVER ----------------
 app = Flask(__name__)
@@ -101,6 +113,41 @@ last_slider_value = 0
 def index():
     return render_template("dashboard.html")
 
+# -------- MOTION HISTORY (CHARTS) --------
+history = HistoryStore()
+
+@app.route("/history")
+def history_api():
+    seconds = request.args.get("seconds", 600.0, type=float)
+    end = request.args.get("end", time.time(), type=float)
+    points = min(request.args.get("points", 300, type=int), 2000)
+    method = request.args.get("method", "minmax")
+    axis = request.args.get("axis")
+    return jsonify(history.query(end - seconds, end, points, method, axis))
+
+# -------- MODEL REGISTRY --------
+@app.route("/models")
+def models_status():
+    return jsonify(registry.status())
+
+# Changing the model that drives actuation needs RASH_ADMIN_TOKEN, sent back
+# as X-Admin-Token; without it promotion is disabled
+ADMIN_TOKEN = os.environ.get("RASH_ADMIN_TOKEN", "")
+
+def admin_allowed():
+    token = request.headers.get("X-Admin-Token", "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+@app.route("/models/promote", methods=["POST"])
+def models_promote():
+    if not admin_allowed():
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify({"promoted": registry.promote(), "live": registry.status()["live"]})
+
+@app.route("/imus")
+def imus_status():
+    return jsonify(imus.stats())
+
 # -------- ACCELERATOR SLIDER HANDLER --------
 @socketio.on("set_speed")
 def set_speed(data):
@@ -130,18 +177,102 @@ BOT_TOKEN = "8366269997:AAG517j7wB5Dsm9XG1BwlPAQOrCnXYLVrFI"
 CHAT_ID = "5866641097"
 
 def send_telegram_msg(msg):
+    if SIMULATED:
+        print(f"📩 Telegram (simulated): {msg}")
+        return
     try:
-        url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-        data = {"chat_id": CHAT_ID, "text": msg}
-        # Use a timeout to prevent blocking the safety loop for too long
-        requests.post(url, data=data, timeout=3)
+        with timer("notify"):
+            url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
+            data = {"chat_id": CHAT_ID, "text": msg}
+            # Use a timeout to prevent blocking the safety loop for too long
+            requests.post(url, data=data, timeout=3)
         print(f"📩 Telegram Sent: {msg}")
     except Exception as e:
         print(f"❌ Telegram Error: {e}")
 
+# ---------------- PROFILING ----------------
+# Section timing (RASH_PROFILE_SECTIONS=1 or POST /profile/sections) and
+# on-demand stack sampling. Endpoints need RASH_PROFILE_TOKEN to be set and
+# sent back as X-Profile-Token; without it they are disabled.
+timer = SectionTimer(enabled=os.environ.get("RASH_PROFILE_SECTIONS") == "1")
+sampler = SamplingProfiler()
+PROFILE_TOKEN = os.environ.get("RASH_PROFILE_TOKEN", "")
+
+def profile_allowed():
+    token = request.headers.get("X-Profile-Token", "")
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(token, PROFILE_TOKEN)
+
+@app.route("/profile/sections", methods=["GET", "POST"])
+def profile_sections():
+    if not profile_allowed():
+        return jsonify({"error": "forbidden"}), 403
+    if request.method == "POST":
+        timer.enabled = request.args.get("enable", "1") == "1"
+        if request.args.get("reset") == "1":
+            timer.reset()
+    return jsonify(timer.summary())
+
+@app.route("/profile/start", methods=["POST"])
+def profile_start():
+    if not profile_allowed():
+        return jsonify({"error": "forbidden"}), 403
+    hz = min(max(request.args.get("hz", 100.0, type=float), 1), 1000)
+    return jsonify({"started": sampler.start(hz)})
+
+@app.route("/profile/stop", methods=["POST"])
+def profile_stop():
+    if not profile_allowed():
+        return jsonify({"error": "forbidden"}), 403
+    return Response(sampler.stop(), mimetype="text/plain")
+
+@app.route("/profile/capture")
+def profile_capture():
+    # Collapsed stacks for N seconds across the safety thread and web threads
+    if not profile_allowed():
+        return jsonify({"error": "forbidden"}), 403
+    seconds = min(max(request.args.get("seconds", 10.0, type=float), 0), 120)
+    hz = min(max(request.args.get("hz", 100.0, type=float), 1), 1000)
+    if not sampler.start(hz):
+        return jsonify({"error": "profiler already running"}), 409
+    time.sleep(seconds)
+    return Response(sampler.stop(), mimetype="text/plain")
+
+def loop_emit(event, data):
+    with timer("emits"):
+        socketio.emit(event, data)
+
+# ---------------- SAFETY LOOP TIMING ----------------
+# Per-tick work time and sleep overshoot of the last few minutes as
+# (tick, ms), used to see whether emits back up under dashboard load
+# (load_test.py). ?since=<tick> limits the summary to the ticks after it.
+loop_ticks = 0
+loop_work_ms = collections.deque(maxlen=1000)
+loop_jitter_ms = collections.deque(maxlen=1000)
+
+@app.route("/loop_stats")
+def loop_stats():
+    since = request.args.get("since", 0, type=int)
+
+    def summary(samples):
+        v = sorted(ms for tick, ms in samples if tick > since)
+        if not v:
+            return None
+        return {"count": len(v), "p50": v[len(v) // 2], "p99": v[int(len(v) * 0.99)], "max": v[-1]}
+
+    return jsonify({
+        "ticks": loop_ticks,
+        "work_ms": summary(list(loop_work_ms)),
+        "jitter_ms": summary(list(loop_jitter_ms)),
+    })
+
+def loop_sleep(seconds):
+    start = time.perf_counter()
+    time.sleep(seconds)
+    loop_jitter_ms.append((loop_ticks, (time.perf_counter() - start - seconds) * 1000))
+
 # ---------------- BACKGROUND SAFETY LOOP ----------------
 def safety_loop():
-    global target_speed
+    global target_speed, loop_ticks
 
     rash_start = None
     prev_key = 0
@@ -151,6 +282,7 @@ def safety_loop():
     rash_alert_sent = False
 
     while True:
+        tick_start = time.perf_counter()
         alcohol = GPIO.input(MQ2_PIN)   # 0 = alcohol detected
         key = GPIO.input(KEY_PIN)       # 1 = key ON
 
@@ -160,16 +292,18 @@ def safety_loop():
 
         # -------- KEY TURNED OFF SUDDENLY --------
         if prev_key == 1 and key == 0:
-            socketio.emit("alert", {"msg": "🔑 KEY TURNED OFF – SAFE STOP"})
-            slow_stop()
+            loop_emit("alert", {"msg": "🔑 KEY TURNED OFF – SAFE STOP"})
+            with timer("motor"):
+                slow_stop()
 
         prev_key = key
 
         # -------- KEY OFF --------
         if key == 0:
-            motor_stop()
+            with timer("motor"):
+                motor_stop()
             target_speed = 0
-            socketio.emit("status", {
+            loop_emit("status", {
                 "key": "OFF",
                 "speed": 0,
                 "alcohol": "NO",
@@ -180,7 +314,7 @@ def safety_loop():
             time.sleep(0.3)
             continue
 
-        socketio.emit("status", {"key": "ON"})
+        loop_emit("status", {"key": "ON"})
 
         # -------- ALCOHOL CHECK --------
         if alcohol == 0:
@@ -189,34 +323,46 @@ def safety_loop():
                 alcohol_alert_sent = True
             
             GPIO.output(BUZZER_PIN, 1)
-            motor_stop()
+            with timer("motor"):
+                motor_stop()
             target_speed = 0
-            socketio.emit("alert", {"msg": "🍺 ALCOHOL DETECTED – VEHICLE LOCKED"})
-            socketio.emit("status", {"alcohol": "YES", "speed": 0})
+            loop_emit("alert", {"msg": "🍺 ALCOHOL DETECTED – VEHICLE LOCKED"})
+            loop_emit("status", {"alcohol": "YES", "speed": 0})
             time.sleep(1)
             continue
         else:
             alcohol_alert_sent = False # Reset when alcohol is clear
-            socketio.emit("status", {"alcohol": "NO"})
+            loop_emit("status", {"alcohol": "NO"})
 
         # -------- READ MPU6050 --------
-        Ax = read_raw(ACCEL_XOUT_H) / 16384.0
-        Ay = read_raw(ACCEL_XOUT_H+2) / 16384.0
-        Az = read_raw(ACCEL_XOUT_H+4) / 16384.0
-        Gx = read_raw(GYRO_XOUT_H) / 131.0
-        Gy = read_raw(GYRO_XOUT_H+2) / 131.0
-        Gz = read_raw(GYRO_XOUT_H+4) / 131.0
+        # Fused chassis motion from all IMUs (single IMU: its latest sample)
+        try:
+            # Bus transactions run in imu.BusWorker (timed there, see /imus);
+            # this is the ring buffer read + fusion
+            with timer("imu_fuse"):
+                Ax, Ay, Az, Gx, Gy, Gz = imus.read()
+        except OSError:
+            # No fresh motion data: rash detection is blind, so don't drive
+            with timer("motor"):
+                motor_stop()
+            target_speed = 0
+            loop_emit("alert", {"msg": "🛑 MOTION SENSOR FAULT – VEHICLE STOPPED"})
+            loop_emit("status", {"speed": 0})
+            time.sleep(1)
+            continue
 
-        sample = pd.DataFrame([[Ax, Ay, Az, Gx, Gy, Gz]],
-                               columns=["AccX", "AccY", "AccZ", "GyroX", "GyroY", "GyroZ"])
+        history.append(time.time(), [Ax, Ay, Az, Gx, Gy, Gz])
 
-        pred = model.predict(sample)
+        with timer("predict"):
+            sample = pd.DataFrame([[Ax, Ay, Az, Gx, Gy, Gz]],
+                                   columns=["AccX", "AccY", "AccZ", "GyroX", "GyroY", "GyroZ"])
+            pred = registry.predict(sample)
 
         # -------- RASH DRIVING (AI) --------
         if pred[0] == 1:
             GPIO.output(BUZZER_PIN, 1)
-            socketio.emit("alert", {"msg": "⚠️ RASH DRIVING DETECTED (AI)"})
-            socketio.emit("status", {"rash": "YES"})
+            loop_emit("alert", {"msg": "⚠️ RASH DRIVING DETECTED (AI)"})
+            loop_emit("status", {"rash": "YES"})
 
             if not rash_alert_sent:
                 send_telegram_msg("Rash driving detected ⚠️")
@@ -225,23 +371,27 @@ def safety_loop():
             if rash_start is None:
                 rash_start = time.time()
             elif time.time() - rash_start > 3:
-                slow_stop()
-                socketio.emit("alert", {"msg": "⛔ VEHICLE STOPPED DUE TO RASH DRIVING"})
+                with timer("motor"):
+                    slow_stop()
+                loop_emit("alert", {"msg": "⛔ VEHICLE STOPPED DUE TO RASH DRIVING"})
                 rash_start = None
         else:
             rash_start = None
             rash_alert_sent = False # Reset when driving is normal
             GPIO.output(BUZZER_PIN, 0)
-            socketio.emit("status", {"rash": "NO"})
+            loop_emit("status", {"rash": "NO"})
 
         # -------- CONTINUOUS MOTOR RUN --------
         if target_speed > 0 and alcohol == 1 and key == 1 and pred[0] == 0:
-            motor_forward(target_speed)
+            with timer("motor"):
+                motor_forward(target_speed)
 
-        # Sync real speed always
-        socketio.emit("status", {"speed": current_speed})
+        # Sync real speed always (tick + ts let clients measure fan-out delay)
+        loop_ticks += 1
+        loop_emit("status", {"speed": current_speed, "tick": loop_ticks, "ts": time.time()})
 
-        time.sleep(0.4)
+        loop_work_ms.append((loop_ticks, (time.perf_counter() - tick_start) * 1000))
+        loop_sleep(0.4)
 
 # Start safety thread
 threading.Thread(target=safety_loop, daemon=True).start()
@@ -0,0 +1,239 @@
+# Hot-swappable model registry for the rash driving classifier
+# Watches a directory for new .pkl models, validates them in the background
+# and swaps them in between inference ticks. In shadow mode a new model runs
+# next to the live one (off the safety thread) and only records statistics.
+
+import os
+import joblib
+import numpy as np
+import pandas as pd
+
+# Loading, probe validation and shadow predictions must not run on the
+# eventlet hub between safety-loop ticks, so the watcher and shadow worker
+# are real OS threads (with an unpatched queue) even after monkey_patch()
+try:
+    from eventlet import patcher
+    queue = patcher.original("queue")
+    threading = patcher.original("threading")
+    time = patcher.original("time")
+except ImportError:
+    import queue
+    import threading
+    import time
+
+FEATURES = ["AccX", "AccY", "AccZ", "GyroX", "GyroY", "GyroZ"]
+
+
+def load_probe(csv_path="driving_data.csv"):
+    # Labelled batch used to sanity check every model before it goes live
+    try:
+        df = pd.read_csv(csv_path, header=None, names=FEATURES + ["Label"])
+        df = df.apply(pd.to_numeric, errors="coerce").dropna()
+        df = df[df["Label"].isin([0, 1])]
+        return df[FEATURES], df["Label"].astype(int).to_numpy()
+    except Exception as e:
+        print(f"❌ Probe data error: {e}")
+        return None, None
+
+
+class LoadedModel:
+    def __init__(self, model, version, accuracy=None, recall=None):
+        self.model = model
+        self.version = version
+        self.accuracy = accuracy
+        self.recall = recall
+        self.loaded_at = time.time()
+
+
+class ModelRegistry:
+
+    def __init__(self, initial_path, watch_dir="models", poll_interval=5.0,
+                 shadow=False, min_recall=0.5, tolerance=0.05, probe_csv="driving_data.csv"):
+        self.watch_dir = watch_dir
+        self.poll_interval = poll_interval
+        self.shadow = shadow
+        # A new model must catch at least min_recall of the rash rows and may
+        # not score more than `tolerance` below the live model on the probe
+        self.min_recall = min_recall
+        self.tolerance = tolerance
+        self.probe_x, self.probe_y = load_probe(probe_csv)
+
+        self.lock = threading.Lock()
+        self.seen = {}
+        self.rejected = []
+        self.live = LoadedModel(joblib.load(initial_path), os.path.basename(initial_path))
+        if self.probe_x is not None:
+            try:
+                self.live.accuracy, self.live.recall = self.score(self.live.model)
+            except Exception as e:
+                print(f"❌ Live model probe error: {e}")
+        self.candidate = None
+
+        # Shadow evaluation runs on its own OS thread; batches are dropped if it falls behind
+        self.shadow_queue = queue.Queue(maxsize=64)
+        self.shadow_stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats():
+        return {"batches": 0, "agree": 0, "dropped": 0,
+                "live_ms": 0.0, "candidate_ms": 0.0, "candidate_ms_max": 0.0}
+
+    # ---------------- INFERENCE ----------------
+    def predict(self, sample):
+        # One reference read per tick, so a swap never lands mid-prediction
+        live = self.live
+        start = time.perf_counter()
+        pred = live.model.predict(sample)
+        live_ms = (time.perf_counter() - start) * 1000
+
+        if self.candidate is not None:
+            try:
+                self.shadow_queue.put_nowait((sample, pred, live_ms))
+            except queue.Full:
+                with self.lock:
+                    self.shadow_stats["dropped"] += 1
+        return pred
+
+    def _shadow_worker(self):
+        while True:
+            sample, live_pred, live_ms = self.shadow_queue.get()
+            candidate = self.candidate
+            if candidate is None:
+                continue
+            start = time.perf_counter()
+            try:
+                pred = candidate.model.predict(sample)
+            except Exception as e:
+                print(f"❌ Shadow model error ({candidate.version}): {e}")
+                continue
+            cand_ms = (time.perf_counter() - start) * 1000
+
+            with self.lock:
+                stats = self.shadow_stats
+                stats["batches"] += 1
+                stats["agree"] += int(np.array_equal(pred, live_pred))
+                stats["live_ms"] += live_ms
+                stats["candidate_ms"] += cand_ms
+                stats["candidate_ms_max"] = max(stats["candidate_ms_max"], cand_ms)
+
+    # ---------------- LOADING + VALIDATION ----------------
+    def score(self, model):
+        # (accuracy, recall on rash rows) over the probe batch
+        pred = np.asarray(model.predict(self.probe_x))
+        if pred.shape != self.probe_y.shape:
+            raise ValueError(f"prediction shape {pred.shape} != {self.probe_y.shape}")
+        if not set(np.unique(pred)) <= {0, 1}:
+            raise ValueError("labels outside {0, 1}")
+        accuracy = float((pred == self.probe_y).mean())
+        rash = self.probe_y == 1
+        recall = float(pred[rash].mean()) if rash.any() else 1.0
+        return accuracy, recall
+
+    def validate(self, model):
+        if self.probe_x is None:
+            model.predict(pd.DataFrame([[0.0, 0.0, 1.0, 0.0, 0.0, 0.0]], columns=FEATURES))
+            return None, None
+
+        # Accuracy alone is not enough: always predicting 0 scores ~0.68 here
+        accuracy, recall = self.score(model)
+        if recall < self.min_recall:
+            raise ValueError(f"rash recall {recall:.2f} < {self.min_recall:.2f}")
+        live = self.live
+        if live.recall is not None and recall < live.recall - self.tolerance:
+            raise ValueError(f"rash recall {recall:.2f} worse than live {live.recall:.2f}")
+        if live.accuracy is not None and accuracy < live.accuracy - self.tolerance:
+            raise ValueError(f"probe accuracy {accuracy:.2f} worse than live {live.accuracy:.2f}")
+        return accuracy, recall
+
+    def load(self, path):
+        version = os.path.basename(path)
+        try:
+            model = joblib.load(path)
+            accuracy, recall = self.validate(model)
+        except Exception as e:
+            print(f"❌ Model rejected ({version}): {e}")
+            self.rejected.append({"version": version, "error": str(e), "time": time.time()})
+            return False
+
+        loaded = LoadedModel(model, version, accuracy, recall)
+        if self.shadow:
+            with self.lock:
+                self.shadow_stats = self._empty_stats()
+            self.candidate = loaded
+            print(f"🧪 Shadow model loaded: {version}")
+        else:
+            self.live = loaded
+            print(f"🔁 Live model swapped: {version}")
+        return True
+
+    def promote(self):
+        candidate = self.candidate
+        if candidate is None:
+            return False
+        self.live = candidate
+        self.candidate = None
+        print(f"🔁 Shadow model promoted: {candidate.version}")
+        return True
+
+    # ---------------- DIRECTORY WATCH ----------------
+    def scan(self):
+        if not os.path.isdir(self.watch_dir):
+            return
+        now = time.time()
+        fresh = []
+        for name in os.listdir(self.watch_dir):
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.watch_dir, name)
+            mtime = os.path.getmtime(path)
+            # Skip files still being copied in
+            if self.seen.get(path) == mtime or now - mtime < 1.0:
+                continue
+            fresh.append((mtime, path))
+
+        # Only the newest file counts (e.g. at boot, model_v10 over model_v9);
+        # older ones are marked seen without loading
+        fresh.sort()
+        for mtime, path in fresh:
+            self.seen[path] = mtime
+        if fresh:
+            self.load(fresh[-1][1])
+
+    def _watch(self):
+        while True:
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"❌ Model watch error: {e}")
+            time.sleep(self.poll_interval)
+
+    def start(self):
+        # The newest model already in the directory at boot is treated as a new version
+        threading.Thread(target=self._watch, daemon=True).start()
+        threading.Thread(target=self._shadow_worker, daemon=True).start()
+
+    # ---------------- STATUS ----------------
+    def status(self):
+        def describe(m):
+            if m is None:
+                return None
+            return {"version": m.version, "accuracy": m.accuracy, "recall": m.recall,
+                    "loaded_at": m.loaded_at}
+
+        with self.lock:
+            stats = dict(self.shadow_stats)
+        n = stats["batches"]
+        return {
+            "live": describe(self.live),
+            "candidate": describe(self.candidate),
+            "shadow": {
+                "enabled": self.shadow,
+                "batches": n,
+                "dropped": stats["dropped"],
+                "agreement": stats["agree"] / n if n else None,
+                "live_ms_avg": stats["live_ms"] / n if n else None,
+                "candidate_ms_avg": stats["candidate_ms"] / n if n else None,
+                "candidate_ms_max": stats["candidate_ms_max"],
+            },
+            "rejected": self.rejected[-10:],
+        }
@@ -0,0 +1,226 @@
+# Runtime profiling for the vehicle controller
+# - SectionTimer: per-section timing of the safety loop hot path, a no-op when off
+# - SamplingProfiler: on-demand stack sampling of every thread and, under
+#   eventlet, every greenlet (the safety loop and web handlers all live on
+#   MainThread there), output as collapsed stacks ("a;b;c 42") for
+#   flamegraph.pl / speedscope. Suspended greenlets are sampled too, so the
+#   profile shows where each one waits as well as where it burns CPU.
+
+import collections
+import os
+import sys
+import weakref
+
+# The sampler must be a real OS thread even when eventlet has patched threading,
+# otherwise it would only ever see its own greenlet
+try:
+    from eventlet import patcher
+    _threading = patcher.original("threading")
+    _time = patcher.original("time")
+except ImportError:
+    patcher = None
+    import threading as _threading
+    import time as _time
+
+import threading
+import time
+
+try:
+    import greenlet
+except ImportError:
+    greenlet = None
+
+# ---------------- SECTION TIMER ----------------
+class _NoSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NO_SECTION = _NoSection()
+
+
+class _Section:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = _time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.record(self.name, (_time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class SectionTimer:
+
+    def __init__(self, enabled=False, keep=1000):
+        self.enabled = enabled
+        self.keep = keep
+        self.lock = _threading.Lock()
+        self.stats = {}
+
+    def __call__(self, name):
+        # `with timer("predict"):` costs one attribute check while disabled
+        if not self.enabled:
+            return NO_SECTION
+        return _Section(self, name)
+
+    def record(self, name, ms):
+        with self.lock:
+            s = self.stats.get(name)
+            if s is None:
+                s = self.stats[name] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                        "recent": collections.deque(maxlen=self.keep)}
+            s["count"] += 1
+            s["total_ms"] += ms
+            s["max_ms"] = max(s["max_ms"], ms)
+            s["recent"].append(ms)
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+
+    def summary(self):
+        with self.lock:
+            out = {}
+            for name, s in self.stats.items():
+                recent = sorted(s["recent"])
+                out[name] = {
+                    "count": s["count"],
+                    "avg_ms": s["total_ms"] / s["count"],
+                    "max_ms": s["max_ms"],
+                    "p50_ms": recent[len(recent) // 2],
+                    "p99_ms": recent[int(len(recent) * 0.99)],
+                }
+        return {"enabled": self.enabled, "sections": out}
+
+# ---------------- SAMPLING PROFILER ----------------
+def _frame_name(frame):
+    code = frame.f_code
+    # First line of the function, so samples anywhere in it merge into one frame
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    # Collects stacks only between start() and stop(); nothing runs otherwise
+
+    def __init__(self):
+        self.lock = _threading.Lock()
+        self.wake = _threading.Event()
+        self.running = False
+        self.counts = collections.Counter()
+        self.samples = 0
+        self.thread = None
+        # Greenlets seen switching since start(): id -> weakref, plus the one
+        # running on the hub thread right now
+        self.greenlets = {}
+        self.current = None
+        self.prev_trace = None
+        self.tracing = False
+
+    def start(self, hz=100):
+        interval = 1.0 / min(max(hz, 1), 1000)
+        with self.lock:
+            if self.running:
+                return False
+            self.counts = collections.Counter()
+            self.samples = 0
+            self.wake.clear()
+            # Under eventlet, greenlets are found through greenlet.settrace on
+            # the hub thread (this one) instead of walking the whole heap
+            self.tracing = (greenlet is not None and patcher is not None
+                            and patcher.is_monkey_patched("thread"))
+            if self.tracing:
+                self.greenlets = {}
+                self.current = greenlet.getcurrent()
+                self._seen(self.current)
+                self.prev_trace = greenlet.settrace(self._trace)
+            self.thread = _threading.Thread(target=self._run, args=(interval,),
+                                            name="profiler", daemon=True)
+            # _run waits on the lock, so it only starts once running is set
+            self.thread.start()
+            self.running = True
+        return True
+
+    def stop(self):
+        with self.lock:
+            self.running = False
+            if self.tracing:
+                greenlet.settrace(self.prev_trace)
+                self.tracing = False
+        self.wake.set()
+        thread, self.thread = self.thread, None
+        # Wait with the (possibly patched) sleep: joining a real thread here
+        # would block the eventlet hub
+        while thread is not None and thread.is_alive():
+            time.sleep(0.005)
+        return self.collapsed()
+
+    def _seen(self, g):
+        if id(g) not in self.greenlets:
+            self.greenlets[id(g)] = weakref.ref(g)
+
+    def _trace(self, event, args):
+        # Runs on every greenlet switch while profiling; keep it cheap
+        if event in ("switch", "throw"):
+            origin, target = args
+            self._seen(origin)
+            self._seen(target)
+            self.current = target
+        if self.prev_trace is not None:
+            self.prev_trace(event, args)
+
+    def _add(self, label, frame):
+        stack = []
+        while frame is not None:
+            stack.append(_frame_name(frame))
+            frame = frame.f_back
+        stack.append(label)
+        self.counts[";".join(reversed(stack))] += 1
+
+    def _run(self, interval):
+        with self.lock:
+            pass
+        me = _threading.get_ident()
+        main_ident = _threading.main_thread().ident
+        while self.running:
+            # Green threads report id(greenlet) as their ident
+            names = {t.ident: t.name for t in threading.enumerate()}
+            names.update((t.ident, t.name) for t in _threading.enumerate())
+
+            greenlets = []
+            for key, ref in list(self.greenlets.items()):
+                g = ref()
+                if g is None or g.dead:
+                    self.greenlets.pop(key, None)
+                else:
+                    greenlets.append(g)
+
+            # The greenlet running right now has no gr_frame; its stack is the
+            # OS thread's current frame, labelled with the greenlet's name
+            current = self.current if self.tracing else None
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                label = names.get(ident, f"thread-{ident}")
+                if ident == main_ident and current is not None:
+                    label = names.get(id(current), type(current).__name__)
+                self._add(label, frame)
+
+            for g in greenlets:
+                frame = g.gr_frame
+                if frame is not None:
+                    self._add(names.get(id(g), type(g).__name__), frame)
+
+            self.samples += 1
+            self.wake.wait(interval)
+
+    def collapsed(self):
+        return "\n".join(f"{stack} {n}" for stack, n in self.counts.most_common()) + "\n"
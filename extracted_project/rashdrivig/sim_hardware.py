@@ -0,0 +1,89 @@
+# Simulated Raspberry Pi hardware (RPi.GPIO + smbus) for running main.py off the car
+# Enabled with RASH_SIM=1. Inputs are set from the environment:
+#   RASH_SIM_KEY=1      ignition key (1 = ON)
+#   RASH_SIM_ALCOHOL=1  MQ2 output (0 = alcohol detected)
+
+import os
+import random
+import struct
+
+# ---------------- GPIO ----------------
+class _PWM:
+    def __init__(self, pin, freq):
+        self.pin = pin
+        self.freq = freq
+        self.duty = 0
+
+    def start(self, duty):
+        self.duty = duty
+
+    def ChangeDutyCycle(self, duty):
+        self.duty = duty
+
+    def stop(self):
+        self.duty = 0
+
+
+class _GPIO:
+    BCM = "BCM"
+    IN = "IN"
+    OUT = "OUT"
+    PUD_DOWN = "PUD_DOWN"
+    PUD_UP = "PUD_UP"
+    PWM = _PWM
+
+    def __init__(self):
+        self.outputs = {}
+        self.inputs = {}
+
+    def setwarnings(self, flag):
+        pass
+
+    def setmode(self, mode):
+        pass
+
+    def cleanup(self):
+        self.outputs.clear()
+
+    def setup(self, pin, mode, pull_up_down=None):
+        if mode == self.OUT:
+            self.outputs[pin] = 0
+
+    def output(self, pin, value):
+        self.outputs[pin] = value
+
+    def input(self, pin):
+        if pin in self.inputs:
+            return self.inputs[pin]
+        # main.py pin numbers: 16 = key, 27 = MQ2
+        if pin == 16:
+            return int(os.environ.get("RASH_SIM_KEY", "1"))
+        if pin == 27:
+            return int(os.environ.get("RASH_SIM_ALCOHOL", "1"))
+        return 0
+
+
+GPIO = _GPIO()
+
+# ---------------- SMBUS (MPU6050) ----------------
+class SMBus:
+    # Level car with gravity on Z plus sensor noise
+
+    def __init__(self, bus_no):
+        self.bus_no = bus_no
+
+    def write_byte(self, addr, value):
+        pass
+
+    def write_byte_data(self, addr, reg, value):
+        pass
+
+    def read_byte_data(self, addr, reg):
+        # PWR_MGMT_1 with the sleep bit clear
+        return 0
+
+    def read_i2c_block_data(self, addr, reg, length):
+        acc = [random.gauss(0, 0.03), random.gauss(0, 0.03), 1.0 + random.gauss(0, 0.03)]
+        gyro = [random.gauss(0, 1.0) for _ in range(3)]
+        raw = [int(a * 16384) for a in acc] + [0] + [int(g * 131) for g in gyro]
+        return list(struct.pack(">7h", *raw))[:length]
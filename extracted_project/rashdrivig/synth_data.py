@@ -0,0 +1,195 @@
+# Synthetic driving data generator for scale and regression testing
+# Produces labelled 6-axis IMU streams in the driving_data.csv schema
+# (AccX, AccY, AccZ in g, GyroX, GyroY, GyroZ in deg/s, Label) with normal
+# driving, harsh braking, swerves, sensor noise and bias. Same seed = same data.
+#
+#   python3 synth_data.py --hours 2 --out synthetic.csv
+#   python3 synth_data.py --hours 24 --rate 100 --out synthetic.npy --seed 7
+
+import argparse
+import time
+import numpy as np
+
+COLUMNS = ["AccX", "AccY", "AccZ", "GyroX", "GyroY", "GyroZ", "Label"]
+
+# Samples per generated block; fixed so the output does not depend on how it is consumed
+CHUNK = 1 << 20
+INNER = 1024
+
+DEFAULTS = {
+    "rate_hz": 10.0,           # data_logger.py samples every 0.1 s
+    "brakes_per_min": 0.5,
+    "swerves_per_min": 0.5,
+    "brake_g": (0.4, 0.9),     # peak deceleration
+    "brake_s": (0.5, 2.0),
+    "swerve_g": (0.3, 0.8),    # peak lateral acceleration
+    "swerve_s": (1.0, 3.0),
+    "swerve_dps": (30.0, 90.0),
+    "acc_noise": 0.02,
+    "gyro_noise": 0.8,
+    "acc_bias": 0.03,          # per-session bias spread
+    "gyro_bias": 2.0,
+}
+
+# ---------------- NORMAL DRIVING ----------------
+def _session(seed, params):
+    # Per-session constants: sensor bias and the smooth "road" signal shape
+    rng = np.random.default_rng([seed, 0])
+    bias = np.concatenate((rng.normal(0, params["acc_bias"], 3),
+                           rng.normal(0, params["gyro_bias"], 3)))
+    # Slow sinusoids (0.01 - 0.5 Hz) for throttle, bumps and turns. The
+    # frequencies are shared by all axes and each axis gets its own phase
+    # and amplitude, so a block needs only 2 x 6 trig calls per sample.
+    freqs = rng.uniform(0.01, 0.5, 6)
+    phases = rng.uniform(0, 2 * np.pi, (6, 6))
+    amps = rng.uniform(0.3, 1.0, (6, 6)) * np.array([0.08, 0.06, 0.03, 1.5, 1.5, 3.0]) / 2
+    # sin(wt + p) * a = sin(wt) * a cos(p) + cos(wt) * a sin(p)
+    return bias, freqs, amps * np.cos(phases), amps * np.sin(phases)
+
+
+def _normal(start, n, rate_hz, session):
+    bias, freqs, sin_mix, cos_mix = session
+    step = 2 * np.pi * freqs / rate_hz   # radians per sample
+
+    # Angle addition instead of n x 6 sin/cos calls: trig only runs on an
+    # INNER-long ramp and on one base angle per INNER samples.
+    inner = np.arange(INNER)[:, None] * step
+    base = ((start + np.arange(0, n, INNER))[:, None] * step) % (2 * np.pi)
+    si, ci = np.sin(inner).astype(np.float32), np.cos(inner).astype(np.float32)
+    sb, cb = np.sin(base).astype(np.float32), np.cos(base).astype(np.float32)
+    sin_wt = (sb[:, None] * ci + cb[:, None] * si).reshape(-1, 6)[:n]
+    cos_wt = (cb[:, None] * ci - sb[:, None] * si).reshape(-1, 6)[:n]
+
+    out = sin_wt @ sin_mix.astype(np.float32) + cos_wt @ cos_mix.astype(np.float32)
+    out += bias.astype(np.float32)
+    out[:, 2] += 1.0   # gravity on Z
+    return out
+
+# ---------------- EVENTS ----------------
+def _windows(rng, n, rate_hz, per_min, dur_s):
+    # Random non-empty windows inside the block -> (sample index, phase 0..1, event id).
+    # Starts are only drawn where the whole event fits, so no brake or swerve
+    # is cut off at a block edge.
+    count = rng.poisson(per_min * n / rate_hz / 60.0)
+    lengths = np.clip((rng.uniform(*dur_s, count) * rate_hz).astype(int), 1, n)
+    starts = rng.integers(0, n - lengths + 1)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    idx = np.repeat(starts, lengths) + offsets
+    phase = offsets / np.repeat(lengths, lengths)
+    event = np.repeat(np.arange(count), lengths)
+    return idx, phase, event, count
+
+
+def _add_events(data, label, rng, params):
+    n = len(data)
+    rate = params["rate_hz"]
+
+    # Harsh braking: half-sine deceleration on X with nose-down pitch on GyroY
+    idx, phase, ev, count = _windows(rng, n, rate, params["brakes_per_min"], params["brake_s"])
+    peak = rng.uniform(*params["brake_g"], count)[ev]
+    pulse = np.sin(np.pi * phase)
+    np.add.at(data[:, 0], idx, -peak * pulse)
+    np.add.at(data[:, 4], idx, -peak * 20.0 * np.cos(np.pi * phase))
+    label[idx] = 1
+
+    # Swerve: one full left-right cycle on Y with matching yaw rate on GyroZ
+    idx, phase, ev, count = _windows(rng, n, rate, params["swerves_per_min"], params["swerve_s"])
+    sign = rng.choice([-1.0, 1.0], count)[ev]
+    peak = rng.uniform(*params["swerve_g"], count)[ev] * sign
+    yaw = rng.uniform(*params["swerve_dps"], count)[ev] * sign
+    cycle = np.sin(2 * np.pi * phase)
+    np.add.at(data[:, 1], idx, peak * cycle)
+    np.add.at(data[:, 5], idx, yaw * np.sin(2 * np.pi * phase - np.pi / 2))
+    np.add.at(data[:, 3], idx, peak * 10.0 * cycle)   # body roll
+    label[idx] = 1
+
+# ---------------- GENERATOR ----------------
+def generate_chunks(n_samples, seed=0, **overrides):
+    # Yields (data float32 (n, 6), label int8 (n,)) blocks of up to CHUNK samples
+    params = dict(DEFAULTS, **overrides)
+    session = _session(seed, params)
+    noise = np.array([params["acc_noise"]] * 3 + [params["gyro_noise"]] * 3, dtype=np.float32)
+
+    for block, start in enumerate(range(0, n_samples, CHUNK)):
+        n = min(CHUNK, n_samples - start)
+        rng = np.random.default_rng([seed, 1, block])
+
+        data = _normal(start, n, params["rate_hz"], session)
+        label = np.zeros(n, dtype=np.int8)
+        _add_events(data, label, rng, params)
+        data += rng.standard_normal((n, 6), dtype=np.float32) * noise
+        yield data, label
+
+
+def generate(n_samples, seed=0, **overrides):
+    parts = list(generate_chunks(n_samples, seed, **overrides))
+    if not parts:
+        return np.empty((0, 6), np.float32), np.empty(0, np.int8)
+    return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+# ---------------- WRITERS ----------------
+def write_csv(path, chunks, header=False):
+    # driving_data.csv has no header row, so none by default
+    row = ",".join(["%.6f"] * 6 + ["%d"]) + "\n"
+    total = 0
+    with open(path, "w") as f:
+        if header:
+            f.write(",".join(COLUMNS) + "\n")
+        for data, label in chunks:
+            # One big % format per block is much faster than np.savetxt row by row
+            cols = [data[:, i].astype(float) for i in range(6)] + [label.astype(int)]
+            flat = np.empty(len(label) * 7, dtype=object)
+            for i, c in enumerate(cols):
+                flat[i::7] = c
+            f.write((row * len(label)) % tuple(flat))
+            total += len(label)
+    return total
+
+
+def write_npy(path, chunks, n_samples):
+    # Structured array, loadable with np.load(path) or np.load(path, mmap_mode="r")
+    dtype = np.dtype([(c, np.float32) for c in COLUMNS[:6]] + [("Label", np.int8)])
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(n_samples,))
+    pos = 0
+    for data, label in chunks:
+        block = out[pos:pos + len(label)]
+        for i, c in enumerate(COLUMNS[:6]):
+            block[c] = data[:, i]
+        block["Label"] = label
+        pos += len(label)
+    out.flush()
+    return pos
+
+# ---------------- MAIN ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic driving data generator")
+    parser.add_argument("--hours", type=float, default=1.0)
+    parser.add_argument("--rate", type=float, default=DEFAULTS["rate_hz"], help="samples / s")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--brakes-per-min", type=float, default=DEFAULTS["brakes_per_min"])
+    parser.add_argument("--swerves-per-min", type=float, default=DEFAULTS["swerves_per_min"])
+    parser.add_argument("--acc-noise", type=float, default=DEFAULTS["acc_noise"])
+    parser.add_argument("--gyro-noise", type=float, default=DEFAULTS["gyro_noise"])
+    parser.add_argument("--out", default="synthetic_data.csv", help=".csv or .npy")
+    parser.add_argument("--header", action="store_true", help="write a CSV header row")
+    args = parser.parse_args()
+
+    n = int(args.hours * 3600 * args.rate)
+    chunks = generate_chunks(n, args.seed, rate_hz=args.rate,
+                             brakes_per_min=args.brakes_per_min,
+                             swerves_per_min=args.swerves_per_min,
+                             acc_noise=args.acc_noise, gyro_noise=args.gyro_noise)
+
+    start = time.time()
+    if args.out.endswith(".npy"):
+        total = write_npy(args.out, chunks, n)
+    else:
+        total = write_csv(args.out, chunks, args.header)
+    took = time.time() - start
+
+    print(f"✅ {total} samples ({args.hours} h @ {args.rate:g} Hz) -> {args.out}")
+    print(f"⏱️ {took:.2f}s ({total / max(took, 1e-9) / 1e6:.2f} M samples/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,11 @@
 # Run with:  python3 vehicle_dashboard.py
 # Open browser: http://<raspberry_pi_ip>:5000
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
+import json
+import threading
 import time
+import uuid
 
 app = Flask(__name__)
 
@@ -17,6 +20,38 @@ buzzer_on = False
 last_speed = 0
 last_change_time = time.time()
 
+# ---------------- STATE VERSIONING ----------------
+# Every visible change bumps the version; /events pushes it and /status
+# answers 304 while a client's ETag still matches. The version restarts at 0
+# with the process, so ETags and event ids carry a per-boot id as well.
+BOOT_ID = uuid.uuid4().hex[:8]
+state_version = 0
+state_cond = threading.Condition()
+last_snapshot = None
+
+
+def state_tag(version):
+    return f"{BOOT_ID}-{version}"
+
+
+def snapshot():
+    return {
+        "speed": current_speed,
+        "vehicle_status": vehicle_status,
+        "alert": alert_message,
+        "buzzer": buzzer_on
+    }
+
+
+def publish_state():
+    global state_version, last_snapshot
+    with state_cond:
+        snap = snapshot()
+        if snap != last_snapshot:
+            last_snapshot = snap
+            state_version += 1
+            state_cond.notify_all()
+
 # ---------------- HARDWARE HOOKS (CONNECT WITH YOUR MAIN CODE) ----------------
 # Replace these print statements with your real motor / buzzer functions
 
@@ -42,10 +77,11 @@ def buzzer_off_func():
 
 # ---------------- RASH ACCELERATOR LOGIC ----------------
 
-def check_rash_accelerator(new_speed):
+def check_rash_accelerator(new_speed, now=None):
     global last_speed, last_change_time, alert_message
 
-    now = time.time()
+    if now is None:
+        now = time.time()
     speed_change = abs(new_speed - last_speed)
     time_diff = now - last_change_time
 
@@ -98,33 +134,67 @@ def index():
     </div>
 
 <script>
+// Slider moves are batched and sent at most every 250 ms
+let pending = [];
+
 function setSpeed(val) {{
+    const last = pending[pending.length - 1];
+    if (!last || last.speed !== val) {{
+        pending.push({{speed: val, t: Date.now()}});
+    }}
+}}
+
+function flushSpeed() {{
+    if (pending.length === 0) return;
+    const updates = pending;
+    pending = [];
     fetch('/set_speed', {{
         method: 'POST',
         headers: {{'Content-Type': 'application/json'}},
-        body: JSON.stringify({{speed: val}})
+        body: JSON.stringify({{updates: updates, sent: Date.now()}})
     }});
 }}
 
+setInterval(flushSpeed, 250);
+
+function render(data) {{
+    document.getElementById('status').innerText = data.vehicle_status;
+    document.getElementById('speed').innerText = data.speed;
+
+    let alertBox = document.getElementById('alert');
+    alertBox.innerText = data.alert;
+
+    if (data.alert !== "NONE") {{
+        alertBox.className = "alert";
+    }} else {{
+        alertBox.className = "normal";
+    }}
+}}
+
+// Fallback polling: the server answers 304 while nothing changed
+let etag = null;
+let pollTimer = null;
+
 function updateStatus() {{
-    fetch('/status')
-    .then(res => res.json())
-    .then(data => {{
-        document.getElementById('status').innerText = data.vehicle_status;
-        document.getElementById('speed').innerText = data.speed;
-
-        let alertBox = document.getElementById('alert');
-        alertBox.innerText = data.alert;
-
-        if (data.alert !== "NONE") {{
-            alertBox.className = "alert";
-        }} else {{
-            alertBox.className = "normal";
-        }}
-    }});
+    const headers = etag ? {{'If-None-Match': etag}} : {{}};
+    fetch('/status', {{headers: headers, cache: 'no-store'}})
+    .then(res => {{
+        if (res.status === 304) return null;
+        etag = res.headers.get('ETag');
+        return res.json();
+    }})
+    .then(data => {{ if (data) render(data); }});
 }}
 
-setInterval(updateStatus, 500);
+// Server-sent events push the state only when it changes
+if (window.EventSource) {{
+    const events = new EventSource('/events');
+    events.onmessage = (e) => render(JSON.parse(e.data));
+    events.onopen = () => {{ clearInterval(pollTimer); pollTimer = null; }};
+    events.onerror = () => {{ if (!pollTimer) pollTimer = setInterval(updateStatus, 500); }};
+}} else {{
+    pollTimer = setInterval(updateStatus, 500);
+}}
 </script>
 </body>
 </html>
@@ -133,27 +203,73 @@ setInterval(updateStatus, 500);
 
 @app.route("/set_speed", methods=["POST"])
 def set_speed():
-    global current_speed
+    global current_speed, alert_message
 
     data = request.get_json()
-    new_speed = int(data.get("speed", 0))
 
-    check_rash_accelerator(new_speed)
+    # Either a single {"speed": v} or a batch
+    # {"updates": [{"speed": v, "t": ms}, ...], "sent": ms}
+    updates = data.get("updates")
+    if updates is None:
+        updates = [{"speed": data.get("speed", 0)}]
+    if not updates:
+        return jsonify({"status": "ok", "version": state_version})
+
+    # Replay the batch on the server clock, anchored on when the client sent it
+    now = time.time()
+    sent = data.get("sent", updates[-1].get("t"))
+    rash = False
+    for update in updates:
+        new_speed = int(update.get("speed", 0))
+        t = update.get("t")
+        when = now if t is None or sent is None else now - (sent - t) / 1000.0
+
+        check_rash_accelerator(new_speed, when)
+        rash = rash or alert_message != "NONE"
+
+        current_speed = new_speed
 
-    current_speed = new_speed
+    # A later small move in the same batch must not clear the alert before
+    # anyone has seen it
+    if rash and alert_message == "NONE":
+        alert_message = "RASH ACCELERATION DETECTED!"
+        buzzer_on_func()
     motor_set_speed(current_speed)
+    publish_state()
 
-    return jsonify({"status": "ok"})
+    return jsonify({"status": "ok", "version": state_version})
 
 
 @app.route("/status")
 def status():
-    return jsonify({
-        "speed": current_speed,
-        "vehicle_status": vehicle_status,
-        "alert": alert_message,
-        "buzzer": buzzer_on
-    })
+    with state_cond:
+        body, version = snapshot(), state_version
+    resp = jsonify(body)
+    resp.set_etag(state_tag(version))
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
+
+
+@app.route("/events")
+def events():
+    # Last-Event-ID lets a reconnecting browser skip a state it already has
+    seen = request.headers.get("Last-Event-ID")
+
+    def stream():
+        nonlocal seen
+        while True:
+            with state_cond:
+                if seen == state_tag(state_version):
+                    state_cond.wait(timeout=15)
+                body, tag = snapshot(), state_tag(state_version)
+            if tag == seen:
+                yield ": keepalive\n\n"
+                continue
+            seen = tag
+            yield f"id: {tag}\ndata: {json.dumps(body)}\n\n"
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 # ---------------- MAIN ----------------
@@ -161,4 +277,4 @@ def status():
 if __name__ == "__main__":
     print("🚗 Vehicle Dashboard Started")
     print("Open browser at: http://<raspberry_pi_ip>:5000")
-    app.run(host="0.0.0.0", port=5000)
+    app.run(host="0.0.0.0", port=5000, threaded=True)